@@ -0,0 +1,221 @@
+# backend/analytics.py
+import threading
+from datetime import datetime
+
+import numpy as np
+from sqlalchemy import String, select, type_coerce
+
+from models import db, PriceHistory
+
+QUANTILES = {"window_low": 0.0, "p10": 0.10, "p25": 0.25, "median": 0.50, "p75": 0.75}
+
+
+def _to_epoch(values):
+    """datetimes (naive UTC) -> int64 epoch seconds"""
+    return np.array(values, dtype="datetime64[s]").astype(np.int64)
+
+
+class PriceSeriesCache:
+    """
+    Price history held as compact NumPy arrays, one (timestamps, prices) pair per (oem, retailer_id).
+    sync() appends only PriceHistory rows newer than the last one seen, so refresh runs
+    grow the arrays instead of reloading them; stats() computes every part in one batched pass.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # held across a whole sync so overlapping requests never load the same rows twice
+        self._sync_lock = threading.Lock()
+        self._series = {}
+        self._last_id = 0
+        self._flat = None
+
+    def append(self, oems, retailer_ids, timestamps, prices):
+        """Append rows (parallel sequences; timestamps as epoch seconds) to the per-series arrays."""
+        oems = np.asarray(oems, dtype=str)
+        retailer_ids = np.asarray(retailer_ids, dtype=np.int64)
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        prices = np.asarray(prices, dtype=np.float64)
+        keep = ~np.isnan(prices)
+        oems, retailer_ids, timestamps, prices = oems[keep], retailer_ids[keep], timestamps[keep], prices[keep]
+        if not len(prices):
+            return
+        # group rows by (oem, retailer) without a Python loop over rows
+        oem_names, oem_code = np.unique(oems, return_inverse=True)
+        width = int(retailer_ids.max()) + 1
+        keys, inverse = np.unique(oem_code.astype(np.int64) * width + retailer_ids, return_inverse=True)
+        order = np.argsort(inverse, kind="stable")
+        bounds = np.cumsum(np.bincount(inverse))[:-1]
+        with self._lock:
+            for packed, idx in zip(keys.tolist(), np.split(order, bounds)):
+                key = (str(oem_names[packed // width]), packed % width)
+                ts, ps = timestamps[idx], prices[idx]
+                if key in self._series:
+                    old_ts, old_ps = self._series[key]
+                    ts, ps = np.concatenate([old_ts, ts]), np.concatenate([old_ps, ps])
+                self._series[key] = (ts, ps)
+            self._flat = None
+
+    def sync(self, batch_size=50000):
+        """
+        Load PriceHistory rows added since the last sync. Needs an app context.
+        Columns are fetched in batches straight into arrays (no ORM objects, no per-row datetime
+        parsing), so a cold load of millions of rows stays in the low seconds.
+        """
+        with self._sync_lock:
+            # timestamps come back raw (ISO text on SQLite, datetime on Postgres); numpy parses
+            # either in one vectorized call
+            stmt = (select(PriceHistory.id, PriceHistory.oem, PriceHistory.retailer_id, PriceHistory.price,
+                           type_coerce(PriceHistory.timestamp, String))
+                    .where(PriceHistory.id > self._last_id)
+                    .order_by(PriceHistory.id))
+            # Core execution on the session connection: rows stream from the cursor without ORM buffering
+            result = db.session.connection().execute(stmt)
+            last_id = self._last_id
+            batches = []
+            while True:
+                rows = result.fetchmany(batch_size)
+                if not rows:
+                    break
+                ids, oems, retailer_ids, prices, timestamps = zip(*rows)
+                last_id = ids[-1]
+                oems = np.array(oems, dtype=object)
+                retailer_ids = np.array(retailer_ids, dtype=np.float64)
+                prices = np.array(prices, dtype=np.float64)
+                timestamps = np.array(timestamps, dtype="datetime64[us]")
+                keep = (oems != None) & ~np.isnan(prices) & ~np.isnat(timestamps)  # noqa: E711
+                batches.append((
+                    oems[keep].astype(str),
+                    np.nan_to_num(retailer_ids[keep]).astype(np.int64),
+                    timestamps[keep].astype("datetime64[s]").astype(np.int64),
+                    prices[keep],
+                ))
+            if batches:
+                self.append(*(np.concatenate(column) for column in zip(*batches)))
+            self._last_id = last_id
+
+    def series(self, oem, retailer_id):
+        """(timestamps, prices) arrays for one (oem, retailer), or None."""
+        return self._series.get((oem, retailer_id))
+
+    def _flatten(self):
+        # Concatenate all series grouped by oem; rebuilt only after new rows arrive
+        with self._lock:
+            if self._flat is not None:
+                return self._flat
+            keys = sorted(self._series, key=lambda k: (k[0] or "", k[1]))
+            oem_names = []
+            key_oem = np.empty(len(keys), dtype=np.int64)
+            for i, (oem, _) in enumerate(keys):
+                if not oem_names or oem_names[-1] != oem:
+                    oem_names.append(oem)
+                key_oem[i] = len(oem_names) - 1
+            lengths = np.array([len(self._series[k][1]) for k in keys], dtype=np.int64)
+            ts = np.concatenate([self._series[k][0] for k in keys]) if keys else np.empty(0, np.int64)
+            ps = np.concatenate([self._series[k][1] for k in keys]) if keys else np.empty(0, np.float64)
+            # series are appended in id order, so the last element is the latest observation
+            key_last = np.array([self._series[k][1][-1] for k in keys], dtype=np.float64)
+            key_last_ts = np.array([self._series[k][0][-1] for k in keys], dtype=np.int64)
+            self._flat = {
+                "oems": oem_names,
+                "retailer_ids": np.array([k[1] for k in keys], dtype=np.int64),
+                "key_oem": key_oem,
+                "key_last": key_last,
+                "key_last_ts": key_last_ts,
+                "ts": ts,
+                "price": ps,
+                "oem_code": np.repeat(key_oem, lengths),
+            }
+            return self._flat
+
+    def stats(self, window_days=90, below=None, now=None):
+        """
+        Per-oem price stats over the last window_days, all retailers combined:
+        current (best latest price across retailers whose latest observation falls inside the
+        window, so a dropped retailer's old low is not "current"), all-time low, window low/p10/p25/median/p75,
+        deal_score (0-100, share of window prices strictly above the current price) and,
+        when below is given, the share of window prices under that amount.
+        """
+        flat = self._flatten()
+        n_groups = len(flat["oems"])
+        if not n_groups:
+            return {}
+        ts, price, code = flat["ts"], flat["price"], flat["oem_code"]
+        now = int(_to_epoch([now or datetime.utcnow()])[0])
+        cutoff = now - int(window_days * 86400)
+
+        # flat arrays are contiguous per oem, so reduceat over the run starts
+        run_starts = np.cumsum(np.bincount(code, minlength=n_groups)) - np.bincount(code, minlength=n_groups)
+        all_time_low = np.minimum.reduceat(price, run_starts)
+
+        # best current price per oem and the retailer offering it; stale series rank as +inf
+        key_current = np.where(flat["key_last_ts"] >= cutoff, flat["key_last"], np.inf)
+        order = np.lexsort((key_current, flat["key_oem"]))
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = flat["key_oem"][order][1:] != flat["key_oem"][order][:-1]
+        best = order[first]
+        current = key_current[best]
+        has_current = np.isfinite(current)
+        current_retailer = flat["retailer_ids"][best]
+
+        # window prices sorted by (oem, price) so each oem is a contiguous sorted run
+        in_window = ts >= cutoff
+        wg, wp = code[in_window], price[in_window]
+        order = np.lexsort((wp, wg))
+        wg, wp = wg[order], wp[order]
+        counts = np.bincount(wg, minlength=n_groups)
+        starts = np.cumsum(counts) - counts
+        has = counts > 0
+        last = np.maximum(counts - 1, 0)
+
+        out = {}
+        for name, q in QUANTILES.items():
+            pos = starts + q * last
+            lo = np.floor(pos).astype(np.int64)
+            hi = np.ceil(pos).astype(np.int64)
+            if len(wp):
+                lo_v, hi_v = wp[np.minimum(lo, len(wp) - 1)], wp[np.minimum(hi, len(wp) - 1)]
+                out[name] = np.where(has, lo_v + (hi_v - lo_v) * (pos - lo), np.nan)
+            else:
+                out[name] = np.full(n_groups, np.nan)
+
+        # count window prices <= current with one searchsorted over the runs, offset per oem
+        # so the runs stay globally sorted
+        if len(wp):
+            base = price.min()
+            span = np.ceil(price.max() - base) + 1.0
+            query = np.where(has_current, current, base) - base + np.arange(n_groups) * span
+            at_or_below = np.searchsorted(wp - base + wg * span, query, side="right") - starts
+            deal_score = np.where(has & has_current, 100.0 * (counts - at_or_below) / np.maximum(counts, 1), np.nan)
+        else:
+            deal_score = np.full(n_groups, np.nan)
+        if below is not None and len(wp):
+            below_share = np.bincount(wg, weights=(wp < below).astype(np.float64), minlength=n_groups) / np.maximum(counts, 1)
+            below_share = np.where(has, below_share, np.nan)
+        else:
+            below_share = None
+
+        def num(v, digits=2):
+            return None if np.isnan(v) or np.isinf(v) else round(float(v), digits)
+
+        result = {}
+        for g, oem in enumerate(flat["oems"]):
+            row = {
+                "oem": oem,
+                "current_price": num(current[g]),
+                "current_retailer_id": int(current_retailer[g]) if has_current[g] else None,
+                "all_time_low": num(all_time_low[g]),
+                "window_days": window_days,
+                "samples": int(counts[g]),
+                "deal_score": num(deal_score[g], 1),
+            }
+            row.update({name: num(values[g]) for name, values in out.items()})
+            if below_share is not None:
+                row["below"] = below
+                row["below_share"] = num(below_share[g], 4)
+            result[oem] = row
+        return result
+
+
+# shared per-process cache, synced from the db by /api/refresh and /api/analytics
+price_cache = PriceSeriesCache()
@@ -1,9 +1,12 @@
 # backend/app.py
 import os
-from flask import Flask, request, jsonify, send_from_directory
+import json
+import math
+import sys
+import time
+from flask import Blueprint, Flask, current_app, request, jsonify, send_from_directory
 from flask_cors import CORS
 from datetime import datetime
-from psycopg2.extras import RealDictCursor
 
 # Import local modules
 # models.py contains SQLAlchemy models and helper functions (init_db etc)
@@ -15,52 +18,76 @@ from models import (
     ProductUrl,
     PriceHistory,
     NotificationSettings,
+    record_change,
+    latest_change_id,
+    oldest_change_id,
+    get_changes_since,
+    prune_changes,
     init_db as models_init_db,
 )
 
-# scraper and fx and pushbullet client
-from scrapper import scrape_with_retailer
-from fx import get_usd_to_cad_rate
-from notifications.pushbullet import PushbulletClient
+# The scraping stack (requests, bs4, the parse pool), fx, numpy analytics and the pushbullet
+# client are imported inside the endpoints that use them, so a cold start only pays for Flask
+# and SQLAlchemy.
 
-# create app, set static folder to React build
-app = Flask(__name__, static_folder="../frontend/build", static_url_path="/")
-CORS(app)
+api = Blueprint("api", __name__)
 
-# Set up SQLite DB file inside instance folder (safe for Render)
-app.instance_path = app.instance_path  # ensure attribute present
-os.makedirs(app.instance_path, exist_ok=True)
-DB_PATH = os.path.join(app.instance_path, "database.db")
-app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{DB_PATH}"
-app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 
-# initialize db object
-db.init_app(app)
+def create_app(config=None):
+    """Application factory. Does no database work; run bootstrap() once at deploy time."""
+    # static folder is the React build
+    app = Flask(__name__, static_folder="../frontend/build", static_url_path="/")
+    CORS(app)
 
-@app.before_first_request
-def initialize():
-    # Create tables if missing
+    # Set up SQLite DB file inside instance folder (safe for Render)
+    os.makedirs(app.instance_path, exist_ok=True)
+    db_path = os.path.join(app.instance_path, "database.db")
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{db_path}"
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    if config:
+        app.config.update(config)
+
+    db.init_app(app)
+    app.register_blueprint(api)
+
+    @app.cli.command("bootstrap")
+    def bootstrap_command():
+        """Create tables and seed default rows (idempotent)."""
+        bootstrap(app)
+        print("database bootstrapped")
+
+    return app
+
+
+BUILTIN_RETAILERS = [
+    {"name":"CanadaComputers", "domain":"canadacomputers.com", "price_selector":None, "sold_by_selector":None, "sold_by_required":"canada computers", "default_currency":"CAD"},
+    {"name":"MemoryExpress", "domain":"memoryexpress.com", "price_selector":None, "sold_by_selector":None, "sold_by_required":"memory express", "default_currency":"CAD"},
+    {"name":"BestBuy", "domain":"bestbuy.ca", "price_selector":None, "sold_by_selector":None, "sold_by_required":"best buy", "default_currency":"CAD"},
+    {"name":"Newegg", "domain":"newegg.ca", "price_selector":None, "sold_by_selector":None, "sold_by_required":"newegg", "default_currency":"CAD"},
+    {"name":"Amazon.ca", "domain":"amazon.ca", "price_selector":None, "sold_by_selector":"#merchant-info", "sold_by_required":"amazon", "default_currency":"CAD"},
+]
+
+def bootstrap(app):
+    """
+    One-time, idempotent setup: create missing tables, the default NotificationSettings row
+    and the builtin retailers. Run at deploy time (`flask --app app bootstrap` or
+    `python app.py bootstrap`) rather than on the first user request.
+    """
     with app.app_context():
-        db.create_all()
+        models_init_db()
         # Insert a default NotificationSettings row if none exists
         if NotificationSettings.query.first() is None:
-            ns = NotificationSettings(enable=False, pushbullet_token="")
-            db.session.add(ns)
-            db.session.commit()
-        # Insert a few builtin retailers if missing
+            db.session.add(NotificationSettings(enable=False, pushbullet_token=""))
+        # Insert a few builtin retailers if missing (commits both)
         insert_builtin_retailers()
+        prune_changes(CHANGES_RETENTION_DAYS)
 
 def insert_builtin_retailers():
-    # Add common Canadian retailers if they do not exist
-    builtins = [
-        {"name":"CanadaComputers", "domain":"canadacomputers.com", "price_selector":None, "sold_by_selector":None, "sold_by_required":"canada computers", "default_currency":"CAD"},
-        {"name":"MemoryExpress", "domain":"memoryexpress.com", "price_selector":None, "sold_by_selector":None, "sold_by_required":"memory express", "default_currency":"CAD"},
-        {"name":"BestBuy", "domain":"bestbuy.ca", "price_selector":None, "sold_by_selector":None, "sold_by_required":"best buy", "default_currency":"CAD"},
-        {"name":"Newegg", "domain":"newegg.ca", "price_selector":None, "sold_by_selector":None, "sold_by_required":"newegg", "default_currency":"CAD"},
-        {"name":"Amazon.ca", "domain":"amazon.ca", "price_selector":None, "sold_by_selector":"#merchant-info", "sold_by_required":"amazon", "default_currency":"CAD"},
-    ]
-    for b in builtins:
-        if Retailer.query.filter_by(name=b["name"]).first() is None:
+    # Add common Canadian retailers if they do not exist (one lookup for all of them)
+    names = [b["name"] for b in BUILTIN_RETAILERS]
+    existing = {name for (name,) in db.session.query(Retailer.name).filter(Retailer.name.in_(names))}
+    for b in BUILTIN_RETAILERS:
+        if b["name"] not in existing:
             r = Retailer(
                 name=b["name"],
                 domain=b["domain"],
@@ -96,12 +123,40 @@ def build_to_dict(b):
         "parts": [{"id": p.id, "category": p.category, "oem": p.oem, "label": p.label} for p in parts]
     }
 
+def part_to_dict(p):
+    return {"id": p.id, "build_id": p.build_id, "category": p.category, "oem": p.oem, "label": p.label}
+
+def product_url_to_dict(r):
+    return {"id": r.id, "oem": r.oem, "retailer_id": r.retailer_id, "url": r.url}
+
+def price_history_to_dict(r, retailer=None):
+    return {
+        "id": r.id,
+        "oem": r.oem,
+        "retailer_id": r.retailer_id,
+        "retailer_name": retailer.name if retailer else None,
+        "price": r.price,
+        "currency": r.currency,
+        "timestamp": r.timestamp.isoformat() if r.timestamp else None
+    }
+
+def change_to_dict(c):
+    return {
+        "cursor": c.id,
+        "entity": c.entity,
+        "action": c.action,
+        "entity_id": c.entity_id,
+        "data": json.loads(c.payload) if c.payload else None,
+        "timestamp": c.timestamp.isoformat() if c.timestamp else None
+    }
+
 # -----------------------
 # API endpoints
 # -----------------------
 
-@app.route("/api/health", methods=["GET"])
+@api.route("/api/health", methods=["GET"])
 def health():
+    from fx import get_usd_to_cad_rate
     try:
         rate = get_usd_to_cad_rate()
     except Exception:
@@ -110,12 +165,12 @@ def health():
     return jsonify({"status":"ok", "usd_to_cad": rate, "notifications_enabled": bool(settings.enable if settings else False)})
 
 # RETAILERS
-@app.route("/api/retailers", methods=["GET"])
+@api.route("/api/retailers", methods=["GET"])
 def list_retailers():
     rows = Retailer.query.order_by(Retailer.active.desc(), Retailer.name).all()
     return jsonify([retailer_to_dict(r) for r in rows])
 
-@app.route("/api/retailers", methods=["POST"])
+@api.route("/api/retailers", methods=["POST"])
 def add_retailer():
     data = request.get_json() or {}
     name = data.get("name")
@@ -131,25 +186,28 @@ def add_retailer():
         active=True
     )
     db.session.add(r)
+    db.session.flush()
+    record_change("retailer", "create", retailer_to_dict(r))
     db.session.commit()
     return jsonify({"ok": True})
 
-@app.route("/api/retailers/<int:rid>/toggle", methods=["POST"])
+@api.route("/api/retailers/<int:rid>/toggle", methods=["POST"])
 def toggle_retailer(rid):
     r = Retailer.query.get(rid)
     if not r:
         return jsonify({"error":"not found"}), 404
     r.active = not r.active
+    record_change("retailer", "update", retailer_to_dict(r))
     db.session.commit()
     return jsonify({"ok": True})
 
 # BUILDS
-@app.route("/api/builds", methods=["GET"])
+@api.route("/api/builds", methods=["GET"])
 def get_builds():
     rows = Build.query.order_by(Build.id.desc()).all()
     return jsonify([build_to_dict(b) for b in rows])
 
-@app.route("/api/builds", methods=["POST"])
+@api.route("/api/builds", methods=["POST"])
 def create_build():
     data = request.get_json() or {}
     name = data.get("name")
@@ -157,15 +215,17 @@ def create_build():
         return jsonify({"error":"name required"}), 400
     b = Build(name=name)
     db.session.add(b)
+    db.session.flush()
+    record_change("build", "create", {"id": b.id, "name": b.name, "parts": []})
     db.session.commit()
     return jsonify({"ok": True})
 
-@app.route("/api/builds/<int:bid>/parts", methods=["GET"])
+@api.route("/api/builds/<int:bid>/parts", methods=["GET"])
 def get_build_parts(bid):
     parts = Part.query.filter_by(build_id=bid).all()
     return jsonify([{"id":p.id,"category":p.category,"oem":p.oem,"label":p.label} for p in parts])
 
-@app.route("/api/builds/<int:bid>/parts", methods=["POST"])
+@api.route("/api/builds/<int:bid>/parts", methods=["POST"])
 def add_build_part(bid):
     data = request.get_json() or {}
     category = data.get("category")
@@ -175,22 +235,26 @@ def add_build_part(bid):
         return jsonify({"error":"category and oem required"}), 400
     p = Part(build_id=bid, category=category, oem=oem, label=label)
     db.session.add(p)
+    db.session.flush()
+    record_change("part", "create", part_to_dict(p))
     db.session.commit()
     return jsonify({"ok": True})
 
-@app.route("/api/builds/<int:bid>/parts", methods=["DELETE"])
+@api.route("/api/builds/<int:bid>/parts", methods=["DELETE"])
 def delete_build_part(bid):
     data = request.get_json() or {}
     category = data.get("category")
     oem = data.get("oem")
     if not category or not oem:
         return jsonify({"error":"category and oem required"}), 400
-    Part.query.filter_by(build_id=bid, category=category, oem=oem).delete()
+    for p in Part.query.filter_by(build_id=bid, category=category, oem=oem).all():
+        record_change("part", "delete", part_to_dict(p))
+        db.session.delete(p)
     db.session.commit()
     return jsonify({"ok": True})
 
 # PRODUCT URLS
-@app.route("/api/product_urls/<string:oem>", methods=["GET"])
+@api.route("/api/product_urls/<string:oem>", methods=["GET"])
 def get_product_urls(oem):
     rows = ProductUrl.query.filter_by(oem=oem).all()
     result = []
@@ -206,7 +270,7 @@ def get_product_urls(oem):
         })
     return jsonify(result)
 
-@app.route("/api/product_urls/<string:oem>", methods=["POST"])
+@api.route("/api/product_urls/<string:oem>", methods=["POST"])
 def add_product_url(oem):
     data = request.get_json() or {}
     retailer_id = data.get("retailer_id")
@@ -217,27 +281,38 @@ def add_product_url(oem):
     existing = ProductUrl.query.filter_by(oem=oem, retailer_id=retailer_id).first()
     if existing:
         existing.url = url
+        record_change("product_url", "update", product_url_to_dict(existing))
     else:
         p = ProductUrl(oem=oem, retailer_id=retailer_id, url=url)
         db.session.add(p)
+        db.session.flush()
+        record_change("product_url", "create", product_url_to_dict(p))
     db.session.commit()
     return jsonify({"ok": True})
 
-@app.route("/api/product_urls/<int:uid>", methods=["DELETE"])
+@api.route("/api/product_urls/<int:uid>", methods=["DELETE"])
 def delete_product_url(uid):
-    ProductUrl.query.filter_by(id=uid).delete()
+    p = ProductUrl.query.get(uid)
+    if p:
+        record_change("product_url", "delete", product_url_to_dict(p))
+        db.session.delete(p)
     db.session.commit()
     return jsonify({"ok": True})
 
 # PRICE REFRESH (scrapes all active product URLs)
-@app.route("/api/refresh", methods=["POST"])
+@api.route("/api/refresh", methods=["POST"])
 def refresh_all():
+    from scrapper import scrape_many
+    from analytics import price_cache
+    from notification.pushbullet import PushbulletClient
     rows = ProductUrl.query.join(Retailer, ProductUrl.retailer_id==Retailer.id).filter(Retailer.active==True).all()
     settings = NotificationSettings.query.first()
     pb_key = settings.pushbullet_token if settings else None
     notifications_enabled = bool(settings.enable if settings else False)
     pb = PushbulletClient(api_key=pb_key)
     results = []
+    retailers = []
+    jobs = []
     for pu in rows:
         retailer = Retailer.query.get(pu.retailer_id)
         retailer_row = {
@@ -249,11 +324,14 @@ def refresh_all():
             "default_currency": retailer.default_currency,
             "is_builtin": True if retailer.name.lower() in ["newegg","bestbuy","canadacomputers","memoryexpress","amazon.ca"] else False
         }
-        try:
-            out = scrape_with_retailer(pu.url, retailer_row)
-        except Exception as e:
-            results.append({"oem": pu.oem, "retailer": retailer.name, "error": str(e)})
-            continue
+        retailers.append(retailer)
+        jobs.append((pu.url, retailer_row))
+    # fetch concurrently, parse in the process pool
+    try:
+        scraped = scrape_many(jobs)
+    except Exception as e:
+        scraped = [{"error": True, "message": str(e)}] * len(jobs)
+    for pu, retailer, out in zip(rows, retailers, scraped):
         if out.get("error"):
             results.append({"oem": pu.oem, "retailer": retailer.name, "error": out.get("message")})
             continue
@@ -262,6 +340,8 @@ def refresh_all():
         original_currency = out.get("original_currency")
         ph = PriceHistory(oem=pu.oem, retailer_id=pu.retailer_id, price=price_cad, currency=original_currency, timestamp=datetime.utcnow())
         db.session.add(ph)
+        db.session.flush()
+        record_change("price_history", "create", price_history_to_dict(ph, retailer))
         db.session.commit()
         # check previous price
         prev = PriceHistory.query.filter_by(oem=pu.oem, retailer_id=pu.retailer_id).order_by(PriceHistory.timestamp.desc()).limit(2).all()
@@ -276,34 +356,93 @@ def refresh_all():
             body = f"{pu.oem} at {retailer.name}: ${price_cad} CAD. {reason}. {pu.url}"
             pb.send_note(title, body)
         results.append({"oem": pu.oem, "retailer": retailer.name, "price_cad": price_cad})
+    # append this run's rows to the analytics arrays
+    price_cache.sync()
+    prune_changes(CHANGES_RETENTION_DAYS)
     return jsonify({"results": results})
 
 # PRICE HISTORY
-@app.route("/api/price_history/<string:oem>", methods=["GET"])
+@api.route("/api/price_history/<string:oem>", methods=["GET"])
 def price_history(oem):
     rows = PriceHistory.query.filter_by(oem=oem).order_by(PriceHistory.timestamp.desc()).limit(500).all()
     out = []
     for r in rows:
         retailer = Retailer.query.get(r.retailer_id)
-        out.append({
-            "id": r.id,
-            "oem": r.oem,
-            "retailer_name": retailer.name if retailer else None,
-            "price": r.price,
-            "currency": r.currency,
-            "timestamp": r.timestamp.isoformat() if r.timestamp else None
-        })
+        out.append(price_history_to_dict(r, retailer))
     return jsonify(out)
 
+# PRICE ANALYTICS
+# Stats for every tracked part from the cached NumPy price series, e.g.
+# /api/analytics?window_days=90&below=199.99 ; oem=<oem> may be repeated to filter.
+ANALYTICS_MAX_WINDOW_DAYS = 3650
+
+@api.route("/api/analytics", methods=["GET"])
+def price_analytics():
+    from analytics import price_cache
+    window_days = request.args.get("window_days", 90, type=float)
+    if not math.isfinite(window_days) or not 0 < window_days <= ANALYTICS_MAX_WINDOW_DAYS:
+        return jsonify({"error":f"window_days must be between 0 and {ANALYTICS_MAX_WINDOW_DAYS}"}), 400
+    below = request.args.get("below", type=float)
+    if below is not None and not math.isfinite(below):
+        return jsonify({"error":"below must be a finite number"}), 400
+    oems = request.args.getlist("oem") or sorted({oem for (oem,) in db.session.query(Part.oem).distinct() if oem})
+    price_cache.sync()
+    stats = price_cache.stats(window_days=window_days, below=below)
+    out = []
+    for oem in oems:
+        row = stats.get(oem) or {"oem": oem, "samples": 0, "window_days": window_days}
+        out.append(row)
+    return jsonify(out)
+
+# CHANGE FEED
+# Clients first call /api/changes without since to get the current cursor, THEN load everything,
+# then poll /api/changes?since=<cursor> and apply the deltas. Taking the cursor before the full
+# load means a change committed in between is delivered again rather than lost; entries carry
+# the whole row (or its id for deletes), so applying one twice is harmless.
+# Without since, only the current cursor is returned. wait=<seconds> long-polls until
+# something changes (capped at CHANGES_MAX_WAIT, kept below gunicorn's default 30 s worker
+# timeout). A waiting request holds a worker thread, so long-polling needs a threaded or
+# async worker class (gthread/gevent); set CHANGES_MAX_WAIT=0 to disable it.
+# Entries are kept for CHANGES_RETENTION_DAYS (pruned after each refresh and at bootstrap); a
+# client whose cursor is older than that gets 410 with "reload": true and must do the full
+# load again, starting from the returned cursor.
+CHANGES_MAX_WAIT = float(os.environ.get("CHANGES_MAX_WAIT", "20"))
+CHANGES_POLL_INTERVAL = 0.5
+CHANGES_RETENTION_DAYS = float(os.environ.get("CHANGES_RETENTION_DAYS", "7"))
+
+@api.route("/api/changes", methods=["GET"])
+def get_changes():
+    since = request.args.get("since", type=int)
+    if since is None:
+        return jsonify({"cursor": latest_change_id(), "changes": [], "more": False})
+    # entries after `since` have been pruned when the oldest kept one is not its direct successor
+    oldest = oldest_change_id()
+    if oldest and since < oldest - 1:
+        return jsonify({"error": "cursor too old", "reload": True, "cursor": latest_change_id()}), 410
+    limit = min(max(request.args.get("limit", 500, type=int), 1), 1000)
+    wait = request.args.get("wait", 0, type=float)
+    wait = min(wait, CHANGES_MAX_WAIT) if math.isfinite(wait) and wait > 0 else 0
+    deadline = time.monotonic() + wait
+    rows = get_changes_since(since, limit + 1)
+    while not rows and time.monotonic() < deadline:
+        time.sleep(CHANGES_POLL_INTERVAL)
+        # end the read transaction so the next query sees rows committed meanwhile
+        db.session.rollback()
+        rows = get_changes_since(since, limit + 1)
+    more = len(rows) > limit
+    rows = rows[:limit]
+    cursor = rows[-1].id if rows else since
+    return jsonify({"cursor": cursor, "changes": [change_to_dict(c) for c in rows], "more": more})
+
 # NOTIFICATION SETTINGS
-@app.route("/api/notifications/settings", methods=["GET"])
+@api.route("/api/notifications/settings", methods=["GET"])
 def get_notifications_settings():
     s = NotificationSettings.query.first()
     if not s:
         return jsonify({"pushbullet_api_key": None, "notifications_enabled": False})
     return jsonify({"pushbullet_api_key": s.pushbullet_token, "notifications_enabled": bool(s.enable)})
 
-@app.route("/api/notifications/settings", methods=["POST"])
+@api.route("/api/notifications/settings", methods=["POST"])
 def set_notifications_settings():
     data = request.get_json() or {}
     s = NotificationSettings.query.first()
@@ -316,13 +455,24 @@ def set_notifications_settings():
     return jsonify({"ok": True})
 
 # Serve frontend
-@app.route("/", defaults={"path": ""})
-@app.route("/<path:path>")
+@api.route("/", defaults={"path": ""})
+@api.route("/<path:path>")
 def serve(path):
-    if path != "" and os.path.exists(os.path.join(app.static_folder, path)):
-        return send_from_directory(app.static_folder, path)
-    return send_from_directory(app.static_folder, "index.html")
+    static_folder = current_app.static_folder
+    if path != "" and os.path.exists(os.path.join(static_folder, path)):
+        return send_from_directory(static_folder, path)
+    return send_from_directory(static_folder, "index.html")
+
+
+# WSGI entry point (gunicorn app:app); cheap to build since nothing heavy is imported yet
+app = create_app()
 
 
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=int(os.environ.get("PORT", "10000")))
+    if sys.argv[1:] == ["bootstrap"]:
+        bootstrap(app)
+    else:
+        if os.environ.get("BOOTSTRAP_ON_START", "1") == "1":
+            # local dev convenience; deployments run the bootstrap step instead
+            bootstrap(app)
+        app.run(host="0.0.0.0", port=int(os.environ.get("PORT", "10000")))
@@ -0,0 +1,98 @@
+# backend/benchmarks/bench_analytics.py
+# Times PriceSeriesCache on synthetic history: bulk load, incremental append and the batched stats pass,
+# then sync() from a real SQLite PriceHistory table (cold load and an incremental refresh run).
+# Run from backend/:  python benchmarks/bench_analytics.py --rows 5000000 --parts 2000 --db-rows 1000000
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from analytics import PriceSeriesCache, _to_epoch  # noqa: E402
+from models import db  # noqa: E402
+
+
+def timed(label, fn):
+    t = time.perf_counter()
+    out = fn()
+    print(f"{label:<28}{(time.perf_counter() - t) * 1000:10.1f} ms")
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=2_000_000)
+    ap.add_argument("--parts", type=int, default=1000)
+    ap.add_argument("--retailers", type=int, default=5)
+    ap.add_argument("--days", type=int, default=365)
+    ap.add_argument("--db-rows", type=int, default=1_000_000, help="rows for the sync() benchmark (0 to skip)")
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(42)
+    now = datetime.utcnow()
+    end = int(_to_epoch([now])[0])
+    oems = np.array([f"OEM-{i:05d}" for i in range(args.parts)])[rng.integers(0, args.parts, args.rows)]
+    retailer_ids = rng.integers(1, args.retailers + 1, args.rows)
+    timestamps = np.sort(end - rng.integers(0, args.days * 86400, args.rows))
+    prices = np.round(rng.uniform(50, 2000, args.rows), 2)
+    split = int(args.rows * 0.99)
+
+    print(f"{args.rows:,} rows, {args.parts:,} parts, {args.retailers} retailers")
+    cache = PriceSeriesCache()
+    timed("bulk load (99%)", lambda: cache.append(oems[:split], retailer_ids[:split], timestamps[:split], prices[:split]))
+    timed("stats, cold", lambda: cache.stats(window_days=90, now=now))
+    timed("stats, warm", lambda: cache.stats(window_days=90, now=now))
+    timed("append refresh run (1%)", lambda: cache.append(oems[split:], retailer_ids[split:], timestamps[split:], prices[split:]))
+    stats = timed("stats after append", lambda: cache.stats(window_days=90, below=500, now=now))
+    nbytes = sum(ts.nbytes + ps.nbytes for ts, ps in cache._series.values())
+    print(f"{'series memory':<28}{nbytes / 1e6:10.1f} MB")
+    print(f"{'parts scored':<28}{len(stats):10,}")
+    if args.db_rows:
+        bench_sync(args, oems, retailer_ids, timestamps, prices)
+
+
+def _insert_rows(path, oems, retailer_ids, timestamps, prices):
+    # stored the way SQLAlchemy writes DateTime on SQLite
+    stamps = np.char.replace(np.datetime_as_string(timestamps.astype("datetime64[s]"), unit="us"), "T", " ")
+    conn = sqlite3.connect(path)
+    conn.executemany(
+        "INSERT INTO price_history (oem, retailer_id, price, currency, timestamp) VALUES (?, ?, ?, 'CAD', ?)",
+        zip(oems.tolist(), retailer_ids.tolist(), prices.tolist(), stamps.tolist()),
+    )
+    conn.commit()
+    conn.close()
+
+
+def bench_sync(args, oems, retailer_ids, timestamps, prices):
+    from flask import Flask
+
+    n = min(args.db_rows, len(prices))
+    split = int(n * 0.99)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        app = Flask(__name__)
+        app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{path}"
+        app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+        db.init_app(app)
+        with app.app_context():
+            db.create_all()
+        print(f"\nsync() from SQLite, {n:,} PriceHistory rows")
+        _insert_rows(path, oems[:split], retailer_ids[:split], timestamps[:split], prices[:split])
+        cache = PriceSeriesCache()
+        with app.app_context():
+            timed("sync, cold (99%)", cache.sync)
+            _insert_rows(path, oems[split:n], retailer_ids[split:n], timestamps[split:n], prices[split:n])
+            timed("sync, refresh run (1%)", cache.sync)
+            timed("sync, nothing new", cache.sync)
+        loaded = sum(len(ps) for _, ps in cache._series.values())
+        assert loaded == n, (loaded, n)
+        print(f"{'rows loaded':<28}{loaded:10,}")
+
+
+if __name__ == "__main__":
+    main()
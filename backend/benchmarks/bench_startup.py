@@ -0,0 +1,65 @@
+# backend/benchmarks/bench_startup.py
+# Cold-start time-to-first-response: each run starts a fresh interpreter, imports app,
+# builds the app and serves GET /api/retailers against a bootstrapped temp database.
+# Run from backend/:  python benchmarks/bench_startup.py --runs 10
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ["requests", "bs4", "numpy", "psycopg2", "scrapper", "analytics"]
+
+CHILD = """
+import json, sys, time
+t0 = time.perf_counter()
+sys.path.insert(0, {backend!r})
+import app as appmod
+t_import = time.perf_counter()
+app = appmod.create_app({{"SQLALCHEMY_DATABASE_URI": {uri!r}}})
+if {bootstrap!r}:
+    appmod.bootstrap(app)
+resp = app.test_client().get("/api/retailers")
+t_first = time.perf_counter()
+print(json.dumps({{
+    "status": resp.status_code,
+    "import_ms": (t_import - t0) * 1000,
+    "first_response_ms": (t_first - t0) * 1000,
+    "heavy_loaded": [m for m in {heavy!r} if m in sys.modules],
+}}))
+"""
+
+
+def run_once(uri, bootstrap=False):
+    code = CHILD.format(backend=BACKEND, uri=uri, bootstrap=bootstrap, heavy=HEAVY)
+    t = time.perf_counter()
+    out = subprocess.run([sys.executable, "-c", code], cwd=BACKEND, capture_output=True, text=True, check=True)
+    wall_ms = (time.perf_counter() - t) * 1000
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+    result["process_ms"] = wall_ms
+    return result
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--runs", type=int, default=10)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        uri = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        first = run_once(uri, bootstrap=True)  # deploy-time step, not counted
+        print(f"bootstrap run: {first['first_response_ms']:.1f} ms (status {first['status']})")
+        runs = [run_once(uri) for _ in range(args.runs)]
+
+    for key in ("import_ms", "first_response_ms", "process_ms"):
+        values = [r[key] for r in runs]
+        print(f"{key:<20} median {statistics.median(values):8.1f} ms   min {min(values):8.1f} ms")
+    print(f"{'heavy modules':<20} {', '.join(runs[-1]['heavy_loaded']) or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,6 @@
-import os
+import json
 from flask_sqlalchemy import SQLAlchemy
-from datetime import datetime
+from datetime import datetime, timedelta
 from sqlalchemy.orm import relationship
 
 db = SQLAlchemy()
@@ -55,25 +55,23 @@ class NotificationSettings(db.Model):
     enable = db.Column(db.Boolean, default=False)
 
 
+class ChangeLog(db.Model):
+    # Monotonic change feed; id doubles as the client's sync cursor
+    id = db.Column(db.Integer, primary_key=True)
+    entity = db.Column(db.String(50))
+    action = db.Column(db.String(20))
+    entity_id = db.Column(db.Integer, nullable=True)
+    payload = db.Column(db.Text)
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+
+
 ########################################
 # INIT DB
 ########################################
 
 def init_db():
-    """Initialize database file and tables."""
-    from flask import current_app
-    db_path = os.path.join(current_app.instance_path, "database.db")
-
-    # Ensure instance folder exists
-    os.makedirs(current_app.instance_path, exist_ok=True)
-
-    current_app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{db_path}"
-    current_app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
-
-    db.init_app(current_app)
-
-    with current_app.app_context():
-        db.create_all()
+    """Create any missing tables. Needs an app context with db registered (app.create_app)."""
+    db.create_all()
 
 
 ########################################
@@ -173,3 +171,45 @@ def update_notification_settings(data):
     row.enable = data.get("enable", False)
     row.pushbullet_token = data.get("pushbullet_token", "")
     db.session.commit()
+
+
+########################################
+# CHANGE FEED
+########################################
+
+def record_change(entity, action, data):
+    """Append a change feed entry; it is committed together with the caller's session."""
+    db.session.add(ChangeLog(
+        entity=entity,
+        action=action,
+        entity_id=data.get("id"),
+        payload=json.dumps(data),
+        timestamp=datetime.utcnow(),
+    ))
+
+
+def latest_change_id():
+    row = ChangeLog.query.order_by(ChangeLog.id.desc()).first()
+    return row.id if row else 0
+
+
+def get_changes_since(cursor, limit=500):
+    return ChangeLog.query.filter(ChangeLog.id > cursor).order_by(ChangeLog.id).limit(limit).all()
+
+
+def oldest_change_id():
+    row = ChangeLog.query.order_by(ChangeLog.id).first()
+    return row.id if row else 0
+
+
+def prune_changes(retention_days):
+    """
+    Delete change feed entries older than retention_days. The newest entry is always kept so the
+    id sequence (and therefore every client cursor) keeps increasing even on SQLite, which reuses
+    the ids of deleted trailing rows.
+    """
+    newest = latest_change_id()
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    deleted = ChangeLog.query.filter(ChangeLog.timestamp < cutoff, ChangeLog.id < newest).delete(synchronize_session=False)
+    db.session.commit()
+    return deleted
@@ -1,7 +1,15 @@
 # backend/scraper.py (fixed and complete)
+import codecs
+import json
+import multiprocessing
+import os
 import re
+import threading
 import requests
+from html.parser import HTMLParser
 from bs4 import BeautifulSoup
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
 from fx import get_usd_to_cad_rate
 
@@ -49,10 +57,292 @@ def normalize_price_to_cad(price_text, retailer_default_currency="CAD"):
     return (round(num, 2), "CAD(assumed)", num)
 
 
-# Built-in scrapers: each returns dict or raises
-def _scrape_canadacomputers(url):
-    r = requests.get(url, headers=HEADERS, timeout=15); r.raise_for_status()
-    soup = BeautifulSoup(r.text, "html.parser")
+# -----------------------
+# Streaming fetch layer
+# -----------------------
+# Product pages (Amazon, BestBuy) are often several MB and the price block sits near the top,
+# so pages are streamed in chunks, capped at SCRAPER_MAX_BYTES, and cut short once the
+# fields a scraper needs have been seen.
+SCRAPER_MAX_BYTES = int(os.environ.get("SCRAPER_MAX_BYTES", str(3 * 1024 * 1024)))
+SCRAPER_CHUNK_SIZE = int(os.environ.get("SCRAPER_CHUNK_SIZE", "16384"))
+
+_ANY_TEXT = re.compile(r"\w")
+_DIGITS = re.compile(r"\d")
+_SELLER_RE = re.compile(r"(Sold by|Ships from|Seller|Sold & shipped)", re.I)
+_AVAILABILITY_RE = re.compile(r"Out of Stock|In stock|Available", re.I)
+
+# Minimal CSS selector support for stop hints: tag, .class, #id and [attr='value'] compounds,
+# the descendant combinator and comma-separated alternatives -- enough to reuse the parsers' selectors.
+_COMPOUND_RE = re.compile(r"([a-zA-Z][\w-]*)?((?:[.#][\w-]+|\[[\w-]+=['\"]?[^'\"\]]*['\"]?\])*)$")
+_SIMPLE_RE = re.compile(r"\.([\w-]+)|#([\w-]+)|\[([\w-]+)=['\"]?([^'\"\]]*)['\"]?\]")
+
+
+def _compile_selector(selector):
+    """Compile a simple CSS selector into alternatives, each a tuple of (tag, id, classes, attrs) steps."""
+    alternatives = []
+    for alt in selector.split(","):
+        steps = []
+        for compound in alt.split():
+            m = _COMPOUND_RE.match(compound)
+            if not m:
+                raise ValueError(f"unsupported selector: {compound}")
+            classes, el_id, attrs = set(), None, []
+            for cls, id_, attr, value in _SIMPLE_RE.findall(m.group(2)):
+                if cls:
+                    classes.add(cls)
+                elif id_:
+                    el_id = id_
+                else:
+                    attrs.append((attr, value))
+            steps.append((m.group(1), el_id, frozenset(classes), tuple(attrs)))
+        alternatives.append(tuple(steps))
+    return tuple(alternatives)
+
+
+def _step_matches(step, tag, attrs, classes):
+    s_tag, s_id, s_classes, s_attrs = step
+    return ((s_tag is None or s_tag == tag)
+            and (s_id is None or attrs.get("id") == s_id)
+            and s_classes <= classes
+            and all(attrs.get(k) == v for k, v in s_attrs))
+
+
+def _selector_matches(alternatives, tag, attrs, classes, ancestors):
+    """ancestors is a list of (tag, attrs, classes), outermost first."""
+    for steps in alternatives:
+        if not _step_matches(steps[-1], tag, attrs, classes):
+            continue
+        i = len(steps) - 2
+        for ancestor in reversed(ancestors):
+            if i < 0:
+                break
+            if _step_matches(steps[i], *ancestor):
+                i -= 1
+        if i < 0:
+            return True
+    return False
+
+
+def _hints(**fields):
+    return {field: (_compile_selector(sel) if sel else None, pattern) for field, (sel, pattern) in fields.items()}
+
+
+# Per built-in retailer: field -> (selector, text pattern). A field counts as found once text matching
+# the pattern appears inside an element matching the selector (or anywhere in the page when the selector
+# is None); a matching void element such as <meta> counts once it has a content attribute.
+# The price selector is each parser's highest-priority selector, so the read never stops on a
+# lower-priority match (a related item's ".price") that the full page would have overridden.
+# Availability is only taken from the retailer's stock element (or a JSON-LD availability):
+# generic text such as "Available in stores" in a nav bar must not end the read before the
+# product's own "Out of Stock".
+STOP_HINTS = {
+    "canadacomputers": _hints(
+        price=("span[itemprop='price']", _DIGITS),
+        seller=(None, _SELLER_RE),
+        availability=(".pi-prod-availability, #pi-prod-availability, .stock-status, .availability, #availability", _AVAILABILITY_RE),
+    ),
+    "memoryexpress": _hints(
+        price=("meta[property='og:price:amount']", _DIGITS),
+        seller=(None, _SELLER_RE),
+        availability=(".c-capr-inventory, .c-capr-inventory__availability, .availability, #availability", _AVAILABILITY_RE),
+    ),
+    "bestbuy": _hints(
+        price=(".pricing-price .sr-only", _DIGITS),
+        seller=(".fulfillment-fulfillment-details, .seller-info, .productSellerContainer", _ANY_TEXT),
+        availability=(".availabilityMessage, .availabilityMessage_ig, .availability, #availability", _AVAILABILITY_RE),
+    ),
+    "newegg": _hints(
+        price=(".price-current", _DIGITS),
+        seller=(None, re.compile(r"(Sold by|Ships from|Seller|Sold & shipped|Marketplace)", re.I)),
+        availability=(".product-inventory, .product-flag, .availability, #availability", _AVAILABILITY_RE),
+    ),
+    "amazon": _hints(
+        price=("#priceblock_ourprice", _DIGITS),
+        seller=("#merchant-info", _ANY_TEXT),
+        availability=("#availability, #outOfStock", re.compile(r"Currently unavailable|Out of Stock|In stock|Available", re.I)),
+    ),
+}
+
+_SCHEMA_AVAILABILITY = {
+    "instock": "In Stock",
+    "instoreonly": "In Stock",
+    "limitedavailability": "In Stock",
+    "onlineonly": "In Stock",
+    "outofstock": "Out of Stock",
+    "soldout": "Out of Stock",
+    "discontinued": "Out of Stock",
+}
+
+
+def _offer_from_ld_json(raw):
+    """
+    Pull price/seller/availability out of one schema.org JSON-LD block.
+    Returns a dict with price_raw, seller_text and availability (any may be None), or None if no offer is present.
+    """
+    try:
+        data = json.loads(raw)
+    except Exception:
+        return None
+    stack = [data]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(node)
+            continue
+        if not isinstance(node, dict):
+            continue
+        if "@graph" in node:
+            stack.append(node["@graph"])
+        offers = node.get("offers")
+        if isinstance(offers, list):
+            offers = offers[0] if offers else None
+        if not isinstance(offers, dict):
+            continue
+        price = offers.get("price", offers.get("lowPrice"))
+        price_raw = None
+        if price not in (None, ""):
+            price_raw = f"{offers.get('priceCurrency') or ''} {price}".strip()
+        seller = offers.get("seller")
+        seller_text = seller.get("name") if isinstance(seller, dict) else None
+        availability = None
+        avail = offers.get("availability")
+        if isinstance(avail, str):
+            availability = _SCHEMA_AVAILABILITY.get(avail.rsplit("/", 1)[-1].lower())
+        return {"price_raw": price_raw, "seller_text": seller_text, "availability": availability}
+    return None
+
+
+def _apply_structured_offer(soup, price_raw, seller_text, availability):
+    """
+    Prefer the fields of the page's JSON-LD offer over the selector guesses. fetch_page may stop
+    right after that offer, so it must win for the truncated and the full page to agree.
+    """
+    for script in soup.find_all("script", attrs={"type": "application/ld+json"}):
+        offer = _offer_from_ld_json(script.string or "")
+        if offer:
+            price_raw = offer["price_raw"] or price_raw
+            seller_text = offer["seller_text"] or seller_text
+            availability = offer["availability"] or availability
+            break
+    return price_raw, seller_text, availability
+
+
+_VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "param", "source", "track", "wbr"}
+
+
+class _PageScanner(HTMLParser):
+    """
+    Incremental HTML scanner fed by fetch_page as chunks arrive.
+    Tracks which hinted fields have shown up, or whether a complete JSON-LD offer has been seen.
+    Text is only evaluated at the next tag boundary so a value split across chunks is never judged half-read.
+    """
+
+    def __init__(self, hints):
+        super().__init__(convert_charrefs=True)
+        self.hints = hints
+        self.found = set()
+        self.structured = False
+        # open elements as (tag, attrs, classes, fields whose selector this element matched);
+        # text only counts for a hooked field while its element is still open
+        self._open = []
+        self._text = []
+        self._ld_json = None
+
+    @property
+    def done(self):
+        return self.structured or all(field in self.found for field in self.hints)
+
+    def _flush(self):
+        if not self._text:
+            return
+        text = "".join(self._text)
+        self._text = []
+        armed = set()
+        for *_, fields in self._open:
+            armed |= fields
+        for field, (hooks, pattern) in self.hints.items():
+            if field in self.found or (hooks and field not in armed):
+                continue
+            if pattern.search(text):
+                self.found.add(field)
+
+    def handle_starttag(self, tag, attrs):
+        self._flush()
+        attrs = dict(attrs)
+        if tag == "script" and (attrs.get("type") or "").lower() == "application/ld+json":
+            self._ld_json = []
+            return
+        classes = set((attrs.get("class") or "").split())
+        ancestors = [(t, a, c) for t, a, c, _ in self._open]
+        fields = {field for field, (selector, _) in self.hints.items()
+                  if selector and _selector_matches(selector, tag, attrs, classes, ancestors)}
+        if tag in _VOID_TAGS:
+            # no text to wait for; e.g. <meta property="og:price:amount" content="...">
+            self.found.update(field for field in fields if attrs.get("content"))
+            return
+        self._open.append((tag, attrs, classes, fields))
+
+    def handle_endtag(self, tag):
+        if self._ld_json is not None:
+            if tag == "script":
+                offer = _offer_from_ld_json("".join(self._ld_json))
+                self._ld_json = None
+                if offer and all(offer.values()):
+                    self.structured = True
+                elif offer and offer["availability"] and "availability" in self.hints:
+                    # JSON-LD availability is authoritative (see _apply_structured_offer)
+                    self.found.add("availability")
+            return
+        self._flush()
+        # close the matching element and anything left unclosed inside it; stray end tags are ignored
+        for i in range(len(self._open) - 1, -1, -1):
+            if self._open[i][0] == tag:
+                del self._open[i:]
+                break
+
+    def handle_data(self, data):
+        if self._ld_json is not None:
+            self._ld_json.append(data)
+        else:
+            self._text.append(data)
+
+
+def fetch_page(url, hints=None, max_bytes=None, chunk_size=None):
+    """
+    Stream url and return the decoded HTML read so far.
+    Reading stops after max_bytes (default SCRAPER_MAX_BYTES), or as soon as every field in
+    hints (an entry of STOP_HINTS) or a complete JSON-LD offer has been seen. Without hints
+    only the size cap applies.
+    """
+    max_bytes = max_bytes or SCRAPER_MAX_BYTES
+    chunk_size = chunk_size or SCRAPER_CHUNK_SIZE
+    scanner = _PageScanner(hints) if hints else None
+    parts = []
+    received = 0
+    with requests.get(url, headers=HEADERS, timeout=15, stream=True) as r:
+        r.raise_for_status()
+        try:
+            decoder = codecs.getincrementaldecoder(r.encoding or "utf-8")(errors="replace")
+        except LookupError:
+            decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        for chunk in r.iter_content(chunk_size=chunk_size):
+            chunk = chunk[:max_bytes - received]
+            received += len(chunk)
+            text = decoder.decode(chunk)
+            parts.append(text)
+            if scanner is not None:
+                scanner.feed(text)
+                if scanner.done:
+                    break
+            if received >= max_bytes:
+                break
+        parts.append(decoder.decode(b"", final=True))
+    return "".join(parts)
+
+
+# Built-in parsers: each takes fetched HTML and returns the raw price/seller/availability fields or raises
+def _parse_canadacomputers(html):
+    soup = BeautifulSoup(html, "html.parser")
     price_raw = None
     for sel in ["span[itemprop='price']", ".price", ".product-price span", ".price-big"]:
         el = soup.select_one(sel)
@@ -66,12 +356,11 @@ def _scrape_canadacomputers(url):
     availability = None
     if soup.find(string=re.compile(r"Out of Stock", re.I)): availability = "Out of Stock"
     elif soup.find(string=re.compile(r"In stock|Available", re.I)): availability = "In Stock"
-    price_cad, curr, raw_num = normalize_price_to_cad(price_raw)
-    return {"price_raw": price_raw, "seller_text": seller_text, "price_cad": price_cad, "original_currency": curr, "availability": availability, "timestamp": datetime.utcnow().isoformat()}
+    price_raw, seller_text, availability = _apply_structured_offer(soup, price_raw, seller_text, availability)
+    return {"price_raw": price_raw, "seller_text": seller_text, "availability": availability}
 
-def _scrape_memoryexpress(url):
-    r = requests.get(url, headers=HEADERS, timeout=15); r.raise_for_status()
-    soup = BeautifulSoup(r.text, "html.parser")
+def _parse_memoryexpress(html):
+    soup = BeautifulSoup(html, "html.parser")
     price_raw = None
     og = soup.select_one("meta[property='og:price:amount']")
     if og and og.get("content"): price_raw = og.get("content")
@@ -85,12 +374,11 @@ def _scrape_memoryexpress(url):
     availability = None
     if soup.find(string=re.compile(r"Out of Stock", re.I)): availability = "Out of Stock"
     elif soup.find(string=re.compile(r"In Stock|Available", re.I)): availability = "In Stock"
-    price_cad, curr, raw_num = normalize_price_to_cad(price_raw)
-    return {"price_raw": price_raw, "seller_text": seller_text, "price_cad": price_cad, "original_currency": curr, "availability": availability, "timestamp": datetime.utcnow().isoformat()}
+    price_raw, seller_text, availability = _apply_structured_offer(soup, price_raw, seller_text, availability)
+    return {"price_raw": price_raw, "seller_text": seller_text, "availability": availability}
 
-def _scrape_bestbuy(url):
-    r = requests.get(url, headers=HEADERS, timeout=15); r.raise_for_status()
-    soup = BeautifulSoup(r.text, "html.parser")
+def _parse_bestbuy(html):
+    soup = BeautifulSoup(html, "html.parser")
     price_raw = None
     for sel in [".pricing-price .sr-only", ".priceView-customer-price span", ".priceBlock"]:
         el = soup.select_one(sel)
@@ -104,12 +392,11 @@ def _scrape_bestbuy(url):
     availability = None
     if soup.find(string=re.compile(r"Out of Stock", re.I)): availability = "Out of Stock"
     elif soup.find(string=re.compile(r"In stock|Available", re.I)): availability = "In Stock"
-    price_cad, curr, raw_num = normalize_price_to_cad(price_raw)
-    return {"price_raw": price_raw, "seller_text": seller_text, "price_cad": price_cad, "original_currency": curr, "availability": availability, "timestamp": datetime.utcnow().isoformat()}
+    price_raw, seller_text, availability = _apply_structured_offer(soup, price_raw, seller_text, availability)
+    return {"price_raw": price_raw, "seller_text": seller_text, "availability": availability}
 
-def _scrape_newegg(url):
-    r = requests.get(url, headers=HEADERS, timeout=15); r.raise_for_status()
-    soup = BeautifulSoup(r.text, "html.parser")
+def _parse_newegg(html):
+    soup = BeautifulSoup(html, "html.parser")
     price_raw = None
     for sel in [".price-current", ".product-price .price", ".priceView-hero-price span"]:
         el = soup.select_one(sel)
@@ -123,12 +410,11 @@ def _scrape_newegg(url):
     availability = None
     if soup.find(string=re.compile(r"Out of Stock", re.I)): availability = "Out of Stock"
     elif soup.find(string=re.compile(r"In stock|Available", re.I)): availability = "In Stock"
-    price_cad, curr, raw_num = normalize_price_to_cad(price_raw)
-    return {"price_raw": price_raw, "seller_text": seller_text, "price_cad": price_cad, "original_currency": curr, "availability": availability, "timestamp": datetime.utcnow().isoformat()}
+    price_raw, seller_text, availability = _apply_structured_offer(soup, price_raw, seller_text, availability)
+    return {"price_raw": price_raw, "seller_text": seller_text, "availability": availability}
 
-def _scrape_amazon(url):
-    r = requests.get(url, headers=HEADERS, timeout=15); r.raise_for_status()
-    soup = BeautifulSoup(r.text, "html.parser")
+def _parse_amazon(html):
+    soup = BeautifulSoup(html, "html.parser")
     price_raw = None
     for sel in ["#priceblock_ourprice", "#priceblock_dealprice", ".a-price .a-offscreen"]:
         el = soup.select_one(sel)
@@ -139,62 +425,224 @@ def _scrape_amazon(url):
     availability = None
     if soup.find(string=re.compile(r"Currently unavailable|Out of Stock", re.I)): availability = "Out of Stock"
     elif soup.find(string=re.compile(r"In stock|Available", re.I)): availability = "In Stock"
-    price_cad, curr, raw_num = normalize_price_to_cad(price_raw)
-    return {"price_raw": price_raw, "seller_text": seller_text, "price_cad": price_cad, "original_currency": curr, "availability": availability, "timestamp": datetime.utcnow().isoformat()}
+    price_raw, seller_text, availability = _apply_structured_offer(soup, price_raw, seller_text, availability)
+    return {"price_raw": price_raw, "seller_text": seller_text, "availability": availability}
 
 BUILTINS = {
-    "canadacomputers": _scrape_canadacomputers,
-    "memoryexpress": _scrape_memoryexpress,
-    "bestbuy": _scrape_bestbuy,
-    "newegg": _scrape_newegg,
-    "amazon": _scrape_amazon
+    "canadacomputers": _parse_canadacomputers,
+    "memoryexpress": _parse_memoryexpress,
+    "bestbuy": _parse_bestbuy,
+    "newegg": _parse_newegg,
+    "amazon": _parse_amazon
 }
 
+
+# -----------------------
+# Fetch / parse stages
+# -----------------------
+# Fetching is I/O-bound and runs on threads; BeautifulSoup parsing is CPU-bound and runs in a
+# process pool so it scales with cores and large soup trees never live in the web process.
+# SCRAPER_PARSE_WORKERS=0 parses inline in the calling process. The two stages are pipelined
+# and at most SCRAPER_MAX_IN_FLIGHT pages are held by the web process at once.
+SCRAPER_FETCH_WORKERS = int(os.environ.get("SCRAPER_FETCH_WORKERS", "8"))
+SCRAPER_PARSE_WORKERS = int(os.environ.get("SCRAPER_PARSE_WORKERS", str(os.cpu_count() or 1)))
+SCRAPER_PARSE_CHUNKSIZE = int(os.environ.get("SCRAPER_PARSE_CHUNKSIZE", "4"))
+SCRAPER_MAX_IN_FLIGHT = int(os.environ.get(
+    "SCRAPER_MAX_IN_FLIGHT",
+    str(SCRAPER_FETCH_WORKERS + max(SCRAPER_PARSE_WORKERS, 1) * SCRAPER_PARSE_CHUNKSIZE),
+))
+
+NOT_SOLD_BY_RETAILER = "Listing not sold & shipped by retailer (marketplace or third-party)."
+
+_parse_pool = None
+# concurrent refreshes (threaded workers) must not each start a pool
+_parse_pool_lock = threading.Lock()
+
+
+def _get_parse_pool():
+    global _parse_pool
+    with _parse_pool_lock:
+        if _parse_pool is None:
+            # spawn rather than fork: the web process may already be running threads
+            _parse_pool = ProcessPoolExecutor(
+                max_workers=SCRAPER_PARSE_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _parse_pool
+
+
+def _discard_parse_pool(pool):
+    """Drop a broken pool so the next batch starts a fresh one (unless another thread already did)."""
+    global _parse_pool
+    with _parse_pool_lock:
+        if _parse_pool is pool:
+            _parse_pool = None
+    pool.shutdown(wait=False)
+
+
+def _builtin_key(retailer_row):
+    name = (retailer_row.get("name") or "").lower()
+    domain = (retailer_row.get("domain") or "").lower()
+    for frag in BUILTINS:
+        if frag in name or (domain and frag in domain):
+            return frag
+    return None
+
+
+def _parse_custom(html, retailer_row):
+    # custom retailer fallback: try to find price and optionally sold_by info using selectors
+    soup = BeautifulSoup(html, "html.parser")
+    price_text = None
+    ps = retailer_row.get("price_selector")
+    if ps:
+        el = soup.select_one(ps)
+        if el:
+            price_text = el.get_text(" ", strip=True)
+    if not price_text:
+        txt = soup.find(string=re.compile(r"\$\s*\d"))
+        if txt: price_text = txt.strip()
+    sold_by_text = None
+    ssel = retailer_row.get("sold_by_selector")
+    if ssel:
+        sel = soup.select_one(ssel)
+        if sel:
+            sold_by_text = sel.get_text(" ", strip=True)
+    availability = None
+    if soup.find(string=re.compile(r"Out of Stock", re.I)): availability = "Out of Stock"
+    elif soup.find(string=re.compile(r"In stock|Available", re.I)): availability = "In Stock"
+    return {"price_raw": price_text, "seller_text": sold_by_text, "availability": availability}
+
+
+def parse_page(html, retailer_row):
+    """
+    Extract the raw price/seller/availability fields from fetched HTML.
+    Pure and picklable so it can run in the parse pool; returns an error dict instead of raising.
+    """
+    key = _builtin_key(retailer_row)
+    try:
+        if key:
+            return BUILTINS[key](html)
+        return _parse_custom(html, retailer_row)
+    except Exception as e:
+        return {"error": True, "message": str(e)}
+
+
+def _fetch(url, retailer_row):
+    key = _builtin_key(retailer_row)
+    # custom selectors can sit anywhere on the page, so only the size cap applies to them
+    return fetch_page(url, STOP_HINTS.get(key) if key else None)
+
+
+def _finish(fields, retailer_row):
+    """Apply the sold-by check and CAD normalisation to parsed fields, in the calling process."""
+    if fields.get("error"):
+        return fields
+    sold_req = (retailer_row.get("sold_by_required") or "").strip().lower()
+    seller_text = (fields.get("seller_text") or "").lower()
+    if sold_req and sold_req not in seller_text:
+        return {"error": True, "message": NOT_SOLD_BY_RETAILER}
+    # built-in retailers have always assumed CAD for ambiguous "$" prices
+    default_currency = "CAD" if _builtin_key(retailer_row) else retailer_row.get("default_currency", "CAD")
+    price_cad, curr, raw_num = normalize_price_to_cad(fields.get("price_raw"), retailer_default_currency=default_currency)
+    return {"price_raw": fields.get("price_raw"), "seller_text": fields.get("seller_text"), "price_cad": price_cad, "original_currency": curr, "availability": fields.get("availability"), "timestamp": datetime.utcnow().isoformat()}
+
+
 def scrape_with_retailer(url, retailer_row):
     """
     Scrape a URL using built-in logic for known retailers or a simple fallback for custom retailers.
     retailer_row is a dict with keys: name, domain, price_selector, sold_by_selector, sold_by_required, default_currency
+    Parses inline; use scrape_many for batches.
     """
-    name = (retailer_row.get("name") or "").lower()
-    domain = (retailer_row.get("domain") or "").lower()
-    for frag, fn in BUILTINS.items():
-        if frag in name or (domain and frag in domain):
-            try:
-                res = fn(url)
-            except Exception as e:
-                return {"error": True, "message": str(e)}
-            sold_req = (retailer_row.get("sold_by_required") or "").strip().lower()
-            seller_text = (res.get("seller_text") or "").lower() if res.get("seller_text") else ""
-            if sold_req and sold_req not in seller_text:
-                return {"error": True, "message": "Listing not sold & shipped by retailer (marketplace or third-party)."}
-            return res
-    # custom retailer fallback: try to find price and optionally sold_by info using selectors
     try:
-        r = requests.get(url, headers=HEADERS, timeout=15); r.raise_for_status()
-        soup = BeautifulSoup(r.text, "html.parser")
-        price_text = None
-        ps = retailer_row.get("price_selector")
-        if ps:
-            el = soup.select_one(ps)
-            if el:
-                price_text = el.get_text(" ", strip=True)
-        if not price_text:
-            txt = soup.find(string=re.compile(r"\$\s*\d"))
-            if txt: price_text = txt.strip()
-        sold_by_text = None
-        ssel = retailer_row.get("sold_by_selector")
-        if ssel:
-            sel = soup.select_one(ssel)
-            if sel:
-                sold_by_text = sel.get_text(" ", strip=True)
-        sold_req = (retailer_row.get("sold_by_required") or "").strip().lower()
-        if sold_req:
-            if not sold_by_text or sold_req not in sold_by_text.lower():
-                return {"error": True, "message": "Listing not sold & shipped by retailer (marketplace or third-party)."}
-        price_cad, curr, raw_num = normalize_price_to_cad(price_text, retailer_default_currency=retailer_row.get("default_currency","CAD"))
-        availability = None
-        if soup.find(string=re.compile(r"Out of Stock", re.I)): availability = "Out of Stock"
-        elif soup.find(string=re.compile(r"In stock|Available", re.I)): availability = "In Stock"
-        return {"price_raw": price_text, "seller_text": sold_by_text, "price_cad": price_cad, "original_currency": curr, "availability": availability, "timestamp": datetime.utcnow().isoformat()}
+        html = _fetch(url, retailer_row)
     except Exception as e:
         return {"error": True, "message": str(e)}
+    return _finish(parse_page(html, retailer_row), retailer_row)
+
+
+def _fetch_job(job):
+    url, retailer_row = job
+    try:
+        return _fetch(url, retailer_row), None
+    except Exception as e:
+        return None, {"error": True, "message": str(e)}
+
+
+def _parse_batch(batch):
+    return [parse_page(html, retailer_row) for html, retailer_row in batch]
+
+
+def scrape_many(jobs):
+    """
+    Scrape a batch of (url, retailer_row) pairs and return results in the same order.
+    Pages are fetched concurrently on SCRAPER_FETCH_WORKERS threads and handed to the process
+    pool (SCRAPER_PARSE_WORKERS workers) in batches of up to SCRAPER_PARSE_CHUNKSIZE as soon as
+    they arrive. No more than SCRAPER_MAX_IN_FLIGHT pages are fetching, waiting or parsing at once,
+    so memory in the web process stays bounded however many URLs are tracked.
+    """
+    jobs = list(jobs)
+    results = [None] * len(jobs)
+    limit = max(1, SCRAPER_MAX_IN_FLIGHT)
+    pending = {}  # future -> ("fetch", index) or ("parse", (pool, [(index, html), ...]))
+    ready = []  # fetched (index, html) not yet submitted for parsing
+    next_job = 0
+    in_flight = 0
+
+    def parse_inline(batch):
+        for i, html in batch:
+            results[i] = _finish(parse_page(html, jobs[i][1]), jobs[i][1])
+
+    def pool_failed(pool, batch, exc):
+        # a worker died (e.g. OOM on a huge page), or the pool could not run the batch at all
+        # (spawn import error, pickling error): parse this batch inline rather than fail it
+        if isinstance(exc, BrokenProcessPool):
+            _discard_parse_pool(pool)
+        parse_inline(batch)
+
+    def submit_parse(batch):
+        if SCRAPER_PARSE_WORKERS <= 0:
+            parse_inline(batch)
+            return len(batch)
+        pool = _get_parse_pool()
+        try:
+            future = pool.submit(_parse_batch, [(html, jobs[i][1]) for i, html in batch])
+        except Exception as e:
+            pool_failed(pool, batch, e)
+            return len(batch)
+        pending[future] = ("parse", (pool, batch))
+        return 0
+
+    with ThreadPoolExecutor(max_workers=max(1, SCRAPER_FETCH_WORKERS)) as fetchers:
+        while next_job < len(jobs) or pending or ready:
+            while next_job < len(jobs) and in_flight < limit:
+                pending[fetchers.submit(_fetch_job, jobs[next_job])] = ("fetch", next_job)
+                next_job += 1
+                in_flight += 1
+            fetching = any(stage == "fetch" for stage, _ in pending.values())
+            # hand pages over once a batch is full, or when nothing else is coming to fill it
+            while ready and (len(ready) >= SCRAPER_PARSE_CHUNKSIZE or not fetching or in_flight >= limit):
+                batch, ready = ready[:SCRAPER_PARSE_CHUNKSIZE], ready[SCRAPER_PARSE_CHUNKSIZE:]
+                in_flight -= submit_parse(batch)
+            if not pending:
+                continue
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, payload = pending.pop(future)
+                if stage == "fetch":
+                    html, err = future.result()
+                    if err is not None:
+                        results[payload] = err
+                        in_flight -= 1
+                    else:
+                        ready.append((payload, html))
+                    continue
+                pool, batch = payload
+                try:
+                    parsed = future.result()
+                except Exception as e:
+                    pool_failed(pool, batch, e)
+                else:
+                    for (i, _), fields in zip(batch, parsed):
+                        results[i] = _finish(fields, jobs[i][1])
+                in_flight -= len(batch)
+    return results
@@ -0,0 +1,68 @@
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+from flask import Flask
+
+from analytics import PriceSeriesCache
+from models import db, PriceHistory
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{tmp_path / 'test.db'}"
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def test_concurrent_syncs_load_each_row_once(app):
+    start = datetime.utcnow() - timedelta(days=30)
+    with app.app_context():
+        db.session.add_all(
+            PriceHistory(oem="X1", retailer_id=1, price=100 + i % 50, currency="CAD", timestamp=start + timedelta(minutes=i))
+            for i in range(2000)
+        )
+        db.session.commit()
+
+    cache = PriceSeriesCache()
+    barrier = threading.Barrier(3)
+
+    def sync():
+        with app.app_context():
+            barrier.wait()
+            cache.sync()
+
+    threads = [threading.Thread(target=sync) for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(cache.series("X1", 1)[1]) == 2000
+    assert cache.stats(window_days=90)["X1"]["samples"] == 2000
+
+
+def test_current_price_ignores_retailers_without_recent_data():
+    now = datetime(2026, 1, 1)
+    day = 86400
+    t = int((now - datetime(1970, 1, 1)).total_seconds())
+    cache = PriceSeriesCache()
+    # retailer 1 last seen 200 days ago at a low price; retailer 2 is current
+    cache.append(["G1", "G1", "G1"], [1, 2, 2], [t - 200 * day, t - 20 * day, t - day], [100.0, 300.0, 250.0])
+    row = cache.stats(window_days=90, now=now)["G1"]
+    assert row["current_price"] == 250.0
+    assert row["current_retailer_id"] == 2
+    assert row["all_time_low"] == 100.0
+    assert row["deal_score"] == 50.0
+
+    row = cache.stats(window_days=10, now=now)["G1"]
+    assert row["current_price"] == 250.0
+
+    row = cache.stats(window_days=0.5, now=now)["G1"]
+    assert row["current_price"] is None
+    assert row["current_retailer_id"] is None
+    assert row["deal_score"] is None
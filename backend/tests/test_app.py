@@ -0,0 +1,116 @@
+import pytest
+
+import app as appmod
+
+
+@pytest.fixture
+def client(tmp_path):
+    app = appmod.create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'test.db'}"})
+    appmod.bootstrap(app)
+    return app.test_client()
+
+
+@pytest.mark.parametrize("window", ["nan", "inf", "-inf", "0", "-5", "100000"])
+def test_analytics_rejects_bad_window(client, window):
+    assert client.get(f"/api/analytics?window_days={window}").status_code == 400
+
+
+def test_analytics_rejects_non_finite_below(client):
+    assert client.get("/api/analytics?below=nan").status_code == 400
+
+
+def test_analytics_accepts_default_window(client):
+    assert client.get("/api/analytics").status_code == 200
+
+
+def test_changes_pruned_cursor_must_reload(client):
+    from datetime import datetime, timedelta
+
+    from models import ChangeLog, db, prune_changes
+
+    for name in ("A", "B", "C"):
+        client.post("/api/builds", json={"name": name})
+    with client.application.app_context():
+        ChangeLog.query.update({ChangeLog.timestamp: datetime.utcnow() - timedelta(days=30)})
+        db.session.commit()
+        # the newest entry survives so ids keep increasing
+        assert prune_changes(7) == 2
+    gone = client.get("/api/changes?since=0")
+    assert gone.status_code == 410
+    assert gone.json["reload"] is True and gone.json["cursor"] == 3
+    assert [c["cursor"] for c in client.get("/api/changes?since=2").json["changes"]] == [3]
+    client.post("/api/builds", json={"name": "D"})
+    assert [c["cursor"] for c in client.get("/api/changes?since=3").json["changes"]] == [4]
+
+
+def changes(client, since):
+    return client.get(f"/api/changes?since={since}").json["changes"]
+
+
+def test_changes_cursor_and_more_paginate(client):
+    start = client.get("/api/changes").json["cursor"]
+    for i in range(5):
+        client.post("/api/builds", json={"name": f"B{i}"})
+    seen, cursor = [], start
+    while True:
+        page = client.get(f"/api/changes?since={cursor}&limit=2").json
+        seen += [c["data"]["name"] for c in page["changes"]]
+        cursor = page["cursor"]
+        if not page["more"]:
+            break
+        assert len(page["changes"]) == 2
+    assert seen == [f"B{i}" for i in range(5)]
+    assert client.get(f"/api/changes?since={cursor}").json == {"cursor": cursor, "changes": [], "more": False}
+
+
+def test_each_mutating_endpoint_records_a_change(client, monkeypatch):
+    import scrapper
+
+    def entries(cursor):
+        return [(c["entity"], c["action"]) for c in changes(client, cursor)]
+
+    def after(call):
+        cursor = client.get("/api/changes").json["cursor"]
+        assert call().status_code == 200
+        return entries(cursor)
+
+    assert after(lambda: client.post("/api/retailers", json={"name": "Shop"})) == [("retailer", "create")]
+    assert after(lambda: client.post("/api/retailers/1/toggle")) == [("retailer", "update")]
+    assert after(lambda: client.post("/api/retailers/1/toggle")) == [("retailer", "update")]
+    assert after(lambda: client.post("/api/builds", json={"name": "B"})) == [("build", "create")]
+    assert after(lambda: client.post("/api/builds/1/parts", json={"category": "CPU", "oem": "X1"})) == [("part", "create")]
+    assert after(lambda: client.post("/api/product_urls/X1", json={"retailer_id": 1, "url": "http://a"})) == [("product_url", "create")]
+    assert after(lambda: client.post("/api/product_urls/X1", json={"retailer_id": 1, "url": "http://b"})) == [("product_url", "update")]
+
+    monkeypatch.setattr(scrapper, "scrape_many", lambda jobs: [
+        {"price_raw": "$10", "price_cad": 10.0, "original_currency": "CAD", "seller_text": "x", "availability": None}
+        for _ in jobs
+    ])
+    cursor = client.get("/api/changes").json["cursor"]
+    client.post("/api/refresh")
+    [entry] = changes(client, cursor)
+    assert (entry["entity"], entry["action"], entry["data"]["oem"], entry["data"]["price"]) == ("price_history", "create", "X1", 10.0)
+
+    assert after(lambda: client.delete("/api/product_urls/1")) == [("product_url", "delete")]
+    assert after(lambda: client.delete("/api/builds/1/parts", json={"category": "CPU", "oem": "X1"})) == [("part", "delete")]
+
+
+def test_changes_long_poll_wakes_on_commit_from_another_thread(client, monkeypatch):
+    import threading
+    import time
+
+    monkeypatch.setattr(appmod, "CHANGES_POLL_INTERVAL", 0.05)
+    cursor = client.get("/api/changes").json["cursor"]
+
+    def later():
+        time.sleep(0.3)
+        client.application.test_client().post("/api/builds", json={"name": "late"})
+
+    writer = threading.Thread(target=later)
+    writer.start()
+    started = time.monotonic()
+    page = client.get(f"/api/changes?since={cursor}&wait=5").json
+    elapsed = time.monotonic() - started
+    writer.join()
+    assert [c["data"]["name"] for c in page["changes"]] == ["late"]
+    assert 0.25 < elapsed < 4
@@ -0,0 +1,222 @@
+import pytest
+
+from scrapper import STOP_HINTS, _PageScanner, parse_page
+
+
+def scan(html, retailer):
+    scanner = _PageScanner(STOP_HINTS[retailer])
+    pos = None
+    # feed in small pieces like fetch_page does and note where the scanner would stop
+    for i in range(0, len(html), 16):
+        scanner.feed(html[i:i + 16])
+        if scanner.done:
+            pos = i + 16
+            break
+    return scanner, pos
+
+
+def test_hook_only_counts_text_inside_hooked_element():
+    html = ('<html><body><div class="price"></div><nav>Top 10 deals</nav>'
+            '<p>Sold by Canada Computers</p><div class="stock-status">In stock</div>'
+            '<span itemprop="price">$199.99</span><footer>end</footer></body></html>')
+    scanner, pos = scan(html, "canadacomputers")
+    assert pos is not None and pos >= html.index("$199.99")
+    out = parse_page(html[:pos], {"name": "CanadaComputers"})
+    assert out["price_raw"] == "$199.99"
+
+
+def test_generic_available_text_does_not_stop_before_stock_element():
+    html = ('<html><body><nav>Available in stores</nav><p>Sold by Newegg</p>'
+            '<div class="price-current">$50.00</div>' + '<p>filler</p>' * 20 +
+            '<div class="product-inventory">Out of Stock</div><footer>end</footer></body></html>')
+    full = parse_page(html, {"name": "Newegg"})
+    scanner, pos = scan(html, "newegg")
+    assert pos is not None and pos >= html.index("Out of Stock")
+    assert parse_page(html[:pos], {"name": "Newegg"})["availability"] == full["availability"] == "Out of Stock"
+
+
+def test_json_ld_availability_counts_and_wins():
+    html = ('<html><head><script type="application/ld+json">'
+            '{"offers": {"price": "10", "availability": "https://schema.org/OutOfStock"}}'
+            '</script></head><body><nav>Available in stores</nav>'
+            '<div id="merchant-info">Sold by Amazon.ca</div>'
+            '<span class="a-offscreen">$10.00</span><p>more</p></body></html>')
+    scanner, pos = scan(html, "amazon")
+    assert "availability" in scanner.found
+    assert parse_page(html, {"name": "Amazon.ca"})["availability"] == "Out of Stock"
+
+
+
+def scanned_parse(html, retailer, name):
+    """parse_page on whatever fetch_page would have read, next to parse_page on the full page"""
+    _, pos = scan(html, retailer)
+    truncated = html[:pos] if pos is not None else html
+    return parse_page(truncated, {"name": name}), parse_page(html, {"name": name})
+
+
+def test_related_item_price_does_not_stop_canadacomputers():
+    html = ('<html><body><p>Sold by Canada Computers</p><div class="stock-status">In stock</div>'
+            '<div class="related"><div class="price">$5.99</div></div>' + '<p>filler</p>' * 100 +
+            '<span itemprop="price">$199.99</span>' + '<p>filler</p>' * 20 + '</body></html>')
+    truncated, full = scanned_parse(html, "canadacomputers", "CanadaComputers")
+    assert truncated["price_raw"] == full["price_raw"] == "$199.99"
+
+
+def test_sponsored_offscreen_price_does_not_stop_amazon():
+    html = ('<html><body><div id="merchant-info">Ships from and sold by Amazon.ca</div>'
+            '<div id="availability">In stock</div><div class="sponsored"><span class="a-offscreen">$12.00</span></div>'
+            + '<p>filler</p>' * 100 +
+            '<span class="a-price"><span class="a-offscreen">$499.00</span></span>' + '<p>filler</p>' * 20 + '</body></html>')
+    truncated, full = scanned_parse(html, "amazon", "Amazon.ca")
+    assert truncated["price_raw"] == full["price_raw"] == "$499.00"
+
+
+def test_pricing_price_needs_sr_only_child_bestbuy():
+    html = ('<html><body><div class="seller-info">Sold by Best Buy</div><div class="availabilityMessage">Available</div>'
+            '<div class="pricing-price"><span class="badge">Save 10</span></div><span class="sr-only">menu</span>'
+            + '<p>filler</p>' * 50 +
+            '<div class="pricing-price"><span class="sr-only">$899.99</span></div>' + '<p>filler</p>' * 50 + '</body></html>')
+    scanner, pos = scan(html, "bestbuy")
+    assert pos is not None and pos >= html.index("$899.99")
+    truncated, full = scanned_parse(html, "bestbuy", "BestBuy")
+    assert truncated["price_raw"] == full["price_raw"] == "$899.99"
+
+
+def test_scrape_many_keeps_order_and_bounds_pages_in_flight(monkeypatch):
+    import threading
+    import time
+
+    import scrapper
+
+    held = {"now": 0, "max": 0}
+    lock = threading.Lock()
+
+    def fake_fetch(url, retailer_row):
+        if url.endswith("/bad"):
+            raise IOError("boom")
+        with lock:
+            held["now"] += 1
+            held["max"] = max(held["max"], held["now"])
+        time.sleep(0.01)
+        n = url.rsplit("/", 1)[1]
+        return f'<html><body><div id="merchant-info">Sold by Amazon.ca</div><span class="a-price"><span class="a-offscreen">${n}.00</span></span></body></html>'
+
+    real_finish = scrapper._finish
+
+    def finish(fields, retailer_row):
+        with lock:
+            held["now"] -= 1
+        return real_finish(fields, retailer_row)
+
+    monkeypatch.setattr(scrapper, "_fetch", fake_fetch)
+    monkeypatch.setattr(scrapper, "_finish", finish)
+    monkeypatch.setattr(scrapper, "SCRAPER_PARSE_WORKERS", 0)
+    monkeypatch.setattr(scrapper, "SCRAPER_MAX_IN_FLIGHT", 3)
+    row = {"name": "Amazon.ca", "sold_by_required": "amazon"}
+    jobs = [(f"http://x/{i}", row) for i in range(1, 21)] + [("http://x/bad", row)]
+    results = scrapper.scrape_many(jobs)
+    assert [r["price_cad"] for r in results[:-1]] == [float(i) for i in range(1, 21)]
+    assert results[-1] == {"error": True, "message": "boom"}
+    assert held["max"] <= 3
+
+
+def fake_page_fetch(url, retailer_row):
+    if url.endswith("/bad"):
+        raise IOError("boom")
+    n = url.rsplit("/", 1)[1]
+    return f'<html><body><div id="merchant-info">Sold by Amazon.ca</div><span class="a-price"><span class="a-offscreen">${n}.00</span></span></body></html>'
+
+
+AMAZON = {"name": "Amazon.ca", "sold_by_required": "amazon"}
+PAGE_JOBS = [(f"http://x/{i}", AMAZON) for i in range(1, 11)] + [("http://x/bad", AMAZON)]
+
+
+def assert_page_results(results):
+    assert [r["price_cad"] for r in results[:-1]] == [float(i) for i in range(1, 11)]
+    assert results[-1] == {"error": True, "message": "boom"}
+
+
+class FakePool:
+    """Stands in for the ProcessPoolExecutor; fails every batch with the given exception."""
+
+    def __init__(self, exc, on_submit=False):
+        self.exc = exc
+        self.on_submit = on_submit
+        self.shut_down = False
+
+    def submit(self, fn, *args):
+        from concurrent.futures import Future
+        if self.on_submit:
+            raise self.exc
+        future = Future()
+        future.set_exception(self.exc)
+        return future
+
+    def shutdown(self, wait=True):
+        self.shut_down = True
+
+
+@pytest.fixture
+def pooled(monkeypatch):
+    import scrapper
+
+    monkeypatch.setattr(scrapper, "_fetch", fake_page_fetch)
+    monkeypatch.setattr(scrapper, "SCRAPER_PARSE_WORKERS", 2)
+    monkeypatch.setattr(scrapper, "SCRAPER_PARSE_CHUNKSIZE", 3)
+    monkeypatch.setattr(scrapper, "_parse_pool", None)
+    return scrapper
+
+
+def test_scrape_many_parses_in_process_pool(pooled):
+    try:
+        assert_page_results(pooled.scrape_many(PAGE_JOBS))
+        assert isinstance(pooled._parse_pool, pooled.ProcessPoolExecutor)
+    finally:
+        if pooled._parse_pool is not None:
+            pooled._parse_pool.shutdown()
+
+
+def test_scrape_many_broken_pool_falls_back_inline(pooled):
+    from concurrent.futures.process import BrokenProcessPool
+
+    pool = FakePool(BrokenProcessPool("worker died"))
+    pooled._parse_pool = pool
+    try:
+        assert_page_results(pooled.scrape_many(PAGE_JOBS))
+        # the broken pool is dropped and later batches get a fresh one
+        assert pool.shut_down and pooled._parse_pool is not pool
+    finally:
+        if isinstance(pooled._parse_pool, pooled.ProcessPoolExecutor):
+            pooled._parse_pool.shutdown()
+
+
+@pytest.mark.parametrize("on_submit", [False, True])
+def test_scrape_many_other_pool_errors_fall_back_inline(pooled, on_submit):
+    import pickle
+
+    pool = FakePool(pickle.PicklingError("cannot pickle"), on_submit=on_submit)
+    pooled._parse_pool = pool
+    assert_page_results(pooled.scrape_many(PAGE_JOBS))
+    # not a broken pool, so it is kept
+    assert pooled._parse_pool is pool and not pool.shut_down
+
+
+def test_parse_pool_created_once_under_concurrency(pooled, monkeypatch):
+    import threading
+    import time
+
+    created = []
+
+    class SlowPool:
+        def __init__(self, **kwargs):
+            time.sleep(0.05)
+            created.append(self)
+
+    monkeypatch.setattr(pooled, "ProcessPoolExecutor", SlowPool)
+    pools = []
+    threads = [threading.Thread(target=lambda: pools.append(pooled._get_parse_pool())) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(created) == 1 and all(p is created[0] for p in pools)